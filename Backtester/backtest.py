@@ -2,11 +2,17 @@
 # -*- coding: utf-8 -*-
 
 from __future__ import print_function
+import collections
+import concurrent.futures
 import datetime
+import os
 import pprint
-import queue
 import time
 
+import pandas as pd
+
+from event import EvType
+
 """
 Backtest object will cover event-handling logic and tie together the rest of
 the classes. It will use nested while-loops to handle events in the EventQueue
@@ -51,7 +57,7 @@ class Backtest(object):
         self.portfolio_cls = portfolio
         self.strategy_cls = strategy
 
-        self.events = queue.Queue()
+        self.events = collections.deque()
 
         self.signals = 0
         self.orders = 0
@@ -72,10 +78,49 @@ class Backtest(object):
                                             self.start_date, self.initial_capital)
         self.execution_handler = self.execution_handler_cls(self.events)
 
+    def _on_market(self, event):
+        """
+        Generates signals from the new bar and updates the portfolio's
+        holdings for it.
+        """
+        self.strategy.calculate_signals(event)
+        self.portfolio.update_timeindex(event)
+
+    def _on_signal(self, event):
+        """
+        Turns a SignalEvent into an order through the portfolio.
+        """
+        self.signals += 1
+        self.portfolio.update_signal(event)
+
+    def _on_order(self, event):
+        """
+        Sends an OrderEvent to the execution handler.
+        """
+        self.orders += 1
+        self.execution_handler.execute_order(event)
+
+    def _on_fill(self, event):
+        """
+        Updates the portfolio from a FillEvent.
+        """
+        self.fills += 1
+        self.portfolio.update_fill(event)
+
     def _run_backtest(self):
         """
         Runs backtest.
         """
+        #Handler per event type, looked up once per event instead of going
+        #through an if/elif chain
+        dispatch = {EvType.MARKET: self._on_market,
+                    EvType.SIGNAL: self._on_signal,
+                    EvType.ORDER: self._on_order,
+                    EvType.FILL: self._on_fill}
+        events = self.events
+        popleft = events.popleft
+        hb = self.heartbeat
+
         i = 0
         while True:
             i += 1
@@ -86,34 +131,16 @@ class Backtest(object):
             else:
                 break
 
-            #Handle events
-            while True:
-                try:
-                    #.get(False) stops blocking behavior in retrieving from queue
-                    event = self.events.get(False)
-                except queue.Empty:
-                    break
-                else:
-                    if event is not None:
-                        if event.type == 'MARKET':
-                            self.strategy.calculate_signals(event)
-                            self.portfolio.update_timeindex(event)
-
-                        elif event.type == 'SIGNAL':
-                            self.signals += 1
-                            self.portfolio.update_signal(event)
-
-                        elif event.type == 'ORDER':
-                            self.orders += 1
-                            self.execution_handler.execute_order(event)
-
-                        elif event.type == 'FILL':
-                            self.fills += 1
-                            self.portfolio.update_fill(event)
-
+            #Handle events. Single threaded, so a deque is used instead of a
+            #locking queue.Queue and drained until it's empty
+            while events:
+                event = popleft()
+                if event is not None:
+                    dispatch[event.type](event)
 
-
-            time.sleep(self.heartbeat)
+            #sleep(0) still gives up the GIL, so only sleep for a real heartbeat
+            if hb:
+                time.sleep(hb)
 
     def _output_performance(self):
         """
@@ -143,3 +170,67 @@ class Backtest(object):
         """
         self._run_backtest()
         self._output_performance()
+
+    def simulate_parallel(self, max_workers=None):
+        """
+        Runs a separate backtest for every symbol in symbol_list, each in its
+        own process and with its own initial_capital. Only meaningful for
+        strategies that trade each symbol independently (e.g. the moving
+        average cross), not for pairs strategies.
+
+        Note that constructing the Backtest has already loaded every symbol
+        and built the strategy and portfolio in this process. Only the class
+        types and settings are sent to the workers, which load their own
+        symbol again.
+
+        Parameters
+        ----------
+        max_workers (int) : optional, number of worker processes
+            default = os.cpu_count()
+
+        Returns
+        -------
+        DataFrame of the equity curves side by side, columns keyed on symbol
+        """
+        args = (self.csv_dir, self.initial_capital, self.heartbeat,
+                self.start_date, self.data_handler_cls,
+                self.execution_handler_cls, self.portfolio_cls,
+                self.strategy_cls)
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers or os.cpu_count()) as executor:
+            futures = [executor.submit(_run_single_symbol, s, *args)
+                       for s in self.symbol_list]
+            results = [f.result() for f in futures]
+
+        self.signals = sum(r[1] for r in results)
+        self.orders = sum(r[2] for r in results)
+        self.fills = sum(r[3] for r in results)
+        print("Signals: %s" % self.signals)
+        print("Orders: %s" % self.orders)
+        print("Fills: %s" % self.fills)
+
+        return pd.concat([r[0] for r in results], axis=1,
+                         keys=self.symbol_list)
+
+
+def _run_single_symbol(symbol, csv_dir, initial_capital, heartbeat, start_date,
+                       data_handler, execution_handler, portfolio, strategy):
+    """
+    Backtests a single symbol, run in a worker process by
+    Backtest.simulate_parallel(). Module level so it can be pickled.
+
+    Returns
+    -------
+    Equity curve DataFrame and the number of signals, orders and fills
+    """
+    backtest = Backtest(csv_dir, [symbol], initial_capital, heartbeat,
+                        start_date, data_handler, execution_handler,
+                        portfolio, strategy)
+    backtest._run_backtest()
+    backtest.portfolio.create_equity_curve_dataframe()
+
+    #The final bar is sent twice so the curve ends on a repeated timestamp,
+    #which the side by side concat can't align when the symbols' dates differ
+    curve = backtest.portfolio.equity_curve
+    curve = curve[~curve.index.duplicated(keep='last')]
+    return (curve, backtest.signals, backtest.orders, backtest.fills)
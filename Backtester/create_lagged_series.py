@@ -1,8 +1,18 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+import functools
+import hashlib
+import os, os.path
+
 import numpy as np
 import pandas as pd
 
+CSV_PATH = 'ADD PATH HERE'
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'edb')
+#Part of the cache key, bump it whenever the columns or dtypes of the lagged
+#series change so older cache files aren't reused
+CACHE_VERSION = 2
+
 
 def create_lagged_series(symbol, start_date, end_date, lags=5):
     """
@@ -11,45 +21,140 @@ def create_lagged_series(symbol, start_date, end_date, lags=5):
     trading days (lags defaults to 5 days). Trading vol. and Direction from
     previous day are included as well.
 
+    The result is cached in memory and in CACHE_DIR, keyed on the arguments
+    and the modification time and size of the CSV, so the CSV is only parsed
+    again once it changes.
+
     Returns
     -------
     Dataframe, lagged time series
 
     """
-    # ts = DataReader(symbol, "nasdaq", start_date-datetime.timedelta(days=365),
-    #                 end_date)
-    ts = pd.read_csv('ADD PATH HERE')
-    ts['Date'] = pd.to_datetime(ts['Date'])
-    ts = ts.set_index('Date')
+    return _cached_lagged_series(*csv_key(), symbol, start_date, end_date,
+                                 lags).copy()
+
+
+def csv_key():
+    """
+    A stat() is enough to tell whether the CSV changed since the last call,
+    so this is used to key caches of anything derived from it.
+
+    Returns
+    -------
+    Tuple of CSV_PATH, its modification time (ns) and its size
+    """
+    st = os.stat(CSV_PATH)
+    return CSV_PATH, st.st_mtime_ns, st.st_size
+
+
+@functools.lru_cache(maxsize=16)
+def _cached_lagged_series(csv_path, mtime_ns, size, symbol, start_date,
+                          end_date, lags):
+    """
+    Loads the lagged series from the disk cache, or builds and stores it
+    there. Memoised per process, callers get a copy from
+    create_lagged_series() so the cached frame is never modified.
+    """
+    key = hashlib.sha1(repr((CACHE_VERSION, csv_path, symbol,
+                             start_date.isoformat(), end_date.isoformat(),
+                             lags, mtime_ns, size)).encode()).hexdigest()
+    cache_path = os.path.join(CACHE_DIR, '%s.pkl' % key)
+    if os.path.exists(cache_path):
+        return pd.read_pickle(cache_path)
+
+    tsret = _build_lagged_series(start_date, lags)
+
+    #Written to a temporary file first so a concurrent run never reads a
+    #partial cache file. The cache is only an optimisation, so a CACHE_DIR
+    #that can't be written to (or a full disk) just means it isn't used
+    tmp_path = '%s.%d.tmp' % (cache_path, os.getpid())
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tsret.to_pickle(tmp_path)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return tsret
 
 
-    #Create new lagged DataFrame
-    tslag = pd.DataFrame(index=ts.index)
-    tslag["Today"] = ts["Close/Last"]
-    tslag ["Volume"] = ts["Volume"]
+def _build_lagged_series(start_date, lags):
+    """
+    Builds the lagged returns DataFrame from CSV_PATH, see
+    create_lagged_series()
+    """
+    # ts = DataReader(symbol, "nasdaq", start_date-datetime.timedelta(days=365),
+    #                 end_date)
+    ts = _load_prices()
 
-    #Create shifted lag series of prior trading period close values
-    for i in range(0, lags):
-        tslag["Lag%s" % str(i+1)] = ts["Close/Last"].shift(i+1)
+    #Close to close % returns, the lags are the same returns shifted back
+    close = ts["Close/Last"].to_numpy(dtype=np.float64)
+    ret = np.full(len(close), np.nan)
+    ret[1:] = (close[1:] / close[:-1] - 1.0) * 100.0
 
     #Create the returns DataFrame
-    tsret = pd.DataFrame(index=tslag.index)
-    tsret["Volume"] = tslag["Volume"]
-    tsret["Today"] = tslag["Today"].pct_change()*100.0
+    tsret = pd.DataFrame(index=ts.index)
+    tsret["Volume"] = ts["Volume"]
+    tsret["Today"] = ret
 
     #If any values for % returns equals 0, set them to small number
     #Do this to stop issues with QDA model
+    tsret.loc[tsret["Today"].abs() < 0.0001, "Today"] = 0.0001
 
-    for i,x in enumerate(tsret["Today"]):
-        if (abs(x) < 0.0001):
-            tsret["Today"][i] = 0.0001
+    #Create lagged % returns columns in one block. Row t of the window view
+    #over the NaN padded returns holds returns t-lags..t-1, reversed it is
+    #Lag1..LagN
+    padded = np.concatenate((np.full(lags, np.nan), ret))
+    lag_ret = np.lib.stride_tricks.sliding_window_view(
+        padded, lags)[:len(ret), ::-1]
+    lag_cols = ["Lag%s" % str(i+1) for i in range(0, lags)]
+    #Stored as float32, the model doesn't need double precision predictors
+    tsret = pd.concat(
+        [tsret, pd.DataFrame(lag_ret.astype(np.float32), index=tsret.index,
+                             columns=lag_cols)],
+        axis=1)
 
-    #Create lagged % returns columns
-    for i in range(0, lags):
-        tsret["Lag%s" % str(i+1)] = tslag["Lag%s" % str(i+1)].pct_change()*100.0
-
-    #Create the Direction column (+1 or -1) indicating an up or down day
-    tsret["Direction"] = np.sign(tsret["Today"])
+    #Create the Direction column (+1 or -1) indicating an up or down day,
+    #int8 labels with 0 for the first day that has no return
+    tsret["Direction"] = np.sign(
+        np.nan_to_num(tsret["Today"].to_numpy(), nan=0.0)).astype(np.int8)
     tsret = tsret[tsret.index >= start_date]
 
     return tsret
+
+
+def _load_prices():
+    """
+    Loads the Date, Close/Last and Volume columns of CSV_PATH into a
+    DataFrame indexed on Date.
+
+    The parsed columns are cached in a '.npz' file next to the CSV, which is
+    used instead of the CSV on later runs as long as it is newer than the CSV.
+    """
+    cache_path = CSV_PATH + '.npz'
+    if os.path.exists(cache_path) and \
+            os.path.getmtime(cache_path) >= os.path.getmtime(CSV_PATH):
+        with np.load(cache_path, allow_pickle=False) as data:
+            return pd.DataFrame(
+                {'Close/Last': data['close'], 'Volume': data['volume']},
+                index=pd.DatetimeIndex(data['date'], name='Date'))
+
+    #Only the columns used are parsed, dates are parsed while reading
+    ts = pd.read_csv(CSV_PATH, usecols=['Date', 'Close/Last', 'Volume'],
+                     dtype={'Close/Last': np.float64},
+                     parse_dates=['Date'], index_col='Date')
+    #Written to a temporary file first so a concurrent run never reads a
+    #partial cache file. The cache is only an optimisation, so a data
+    #directory that can't be written to just means it isn't used
+    tmp_path = '%s.%d.tmp' % (cache_path, os.getpid())
+    try:
+        with open(tmp_path, 'wb') as f:
+            np.savez(f,
+                     date=ts.index.values,
+                     close=ts['Close/Last'].to_numpy(),
+                     volume=ts['Volume'].to_numpy())
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return ts
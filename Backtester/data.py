@@ -105,6 +105,15 @@ class DataHandler(object):
         """
         raise NotImplementedError("Implement get_latest_bars_values()")
 
+    @abstractmethod
+    def get_latest_closes(self):
+        """
+        Returns
+        -------
+        NumPy vector of the latest close of every symbol, in symbol_list order
+        """
+        raise NotImplementedError("Implement get_latest_closes()")
+
     @abstractmethod
     def update_bars(self):
         """
@@ -119,6 +128,10 @@ class HistoricCSVDataHandler(DataHandler):
     For reading CSV files for each symbol requested from disk and providing a
     structure to obtain the latest bar in a manner that should replicate a live
     trading interface
+
+    Bars are stored column-wise (one contiguous NumPy array per field) and the
+    "latest" bar of each symbol is tracked with an integer cursor into those
+    arrays, so no per-bar row objects are created during the backtest.
     """
     def __init__(self, events, csv_dir, symbol_list):
 
@@ -133,44 +146,65 @@ class HistoricCSVDataHandler(DataHandler):
         self.csv_dir = csv_dir
         self.symbol_list = symbol_list
         self.symbol_data = {}
-        self.latest_symbol_data = {}
+        self.cursor = {}
+        self.n = {}
         self.continue_backtest = True
         #Method call to read in data and populate symbol_data
         self._open_convert_csv_files()
 
     def _open_convert_csv_files(self):
         """
-        Opens CSV files from the data directory,converts them into pandas
-        DataFrames within a symbol dictionary.
+        Opens CSV files from the data directory, converts them into pandas
+        DataFrames and then into a dictionary of NumPy column arrays for each
+        symbol ('datetime', 'open', 'high', 'low', 'close', 'volume').
         """
-        comb_index = None
-
+        frames = {}
         for s in self.symbol_list:
             # Load the CSV file with no header information, indexed on date
-            self.symbol_data[s] = pd.io.parsers.read_csv(
+            frames[s] = pd.io.parsers.read_csv(
                 os.path.join(self.csv_dir, '%s.csv' % s),
                 header=0, index_col=0, parse_dates=True,
 
                 #names list edited for Nasdaq source
                 names=['datetime', 'close', 'volume','open', 'high', 'low']
-            ).sort_values(by='datetime') #Updated sorting method
-
-
-            # Index combined to pad forward values
-            if comb_index is None:
-                comb_index = self.symbol_data[s].index
-            else:
-                comb_index.union(self.symbol_data[s].index)
-
-            # Set the latest symbol_data to None
-            self.latest_symbol_data[s] = []
-
-        # Reindex the dataframes
+            )
+            #Nasdaq exports are newest first, only sort when out of order
+            if not frames[s].index.is_monotonic_increasing:
+                frames[s] = frames[s].sort_index()
+
+        # Index combined to pad forward values. Index.union returns a new
+        # index, it doesn't update comb_index in place. If every symbol
+        # already shares the same index the union and reindexing are skipped
+        indexes = [frames[s].index for s in self.symbol_list]
+        aligned = all(idx.equals(indexes[0]) for idx in indexes[1:])
+        comb_index = indexes[0]
+        if not aligned:
+            for idx in indexes[1:]:
+                comb_index = comb_index.union(idx)
+
+        # Reindex the dataframes and split them into contiguous column arrays.
+        # Datetimes are kept as Timestamp objects, volume as float64 since
+        # padding can introduce NaNs
         for s in self.symbol_list:
-            self.symbol_data[s] = self.symbol_data[s].\
-                reindex(index=comb_index, method='pad').iterrows()
-
-    def _get_new_bar(self, symbol):
+            df = frames[s]
+            if not aligned:
+                df = df.reindex(index=comb_index, method='pad')
+            cols = {'datetime': df.index.astype(object).to_numpy()}
+            for col in ('open', 'high', 'low', 'close', 'volume'):
+                cols[col] = df[col].to_numpy(np.float64)
+            for arr in cols.values():
+                arr.setflags(write=False)
+            self.symbol_data[s] = cols
+            self.cursor[s] = -1
+            self.n[s] = len(df)
+
+        # Closes of all symbols side by side, one row per bar. All symbols
+        # share the combined index so their cursors always move together
+        self.closes = np.column_stack(
+            [self.symbol_data[s]['close'] for s in self.symbol_list])
+        self.closes.setflags(write=False)
+
+    def _get_cursor(self, symbol):
         """
         Parameters
         ----------
@@ -178,10 +212,13 @@ class HistoricCSVDataHandler(DataHandler):
 
         Returns
         -------
-        Latest bar from data feed
+        Index of the latest bar in the symbol's column arrays
         """
-        for bar in self.symbol_data[symbol]:
-            yield bar
+        try:
+            return self.cursor[symbol]
+        except KeyError:
+            print(symbol,"not available in historic data set")
+            raise
 
     def get_latest_bar(self, symbol):
         """
@@ -191,15 +228,9 @@ class HistoricCSVDataHandler(DataHandler):
 
         Returns
         -------
-        Last bar from the latest_symbol list
+        Last bar as a tuple of (datetime, open, high, low, close, volume)
         """
-        try:
-            bars_list = self.latest_symbol_data[symbol]
-        except KeyError:
-            print(symbol,"not available in historic data set")
-            raise
-        else:
-            return bars_list[-1]
+        return self.get_latest_bars(symbol)[-1]
 
     def get_latest_bars(self, symbol, N=1):
         """
@@ -210,15 +241,14 @@ class HistoricCSVDataHandler(DataHandler):
 
         Returns
         -------
-        Last N bars from the latest_symbol list, or N-k if N not available
+        Last N bars as (datetime, open, high, low, close, volume) tuples,
+        or N-k if N not available
         """
-        try:
-            bars_list = self.latest_symbol_data[symbol]
-        except KeyError:
-            print(symbol,"not available in historic data set")
-            raise
-        else:
-            return bars_list[-N:]
+        i = self._get_cursor(symbol)
+        start = max(0, i - N + 1)
+        cols = self.symbol_data[symbol]
+        return list(zip(*(cols[c][start:i + 1] for c in
+                          ('datetime', 'open', 'high', 'low', 'close', 'volume'))))
 
     def get_latest_bar_datetime(self, symbol):
         """
@@ -230,13 +260,8 @@ class HistoricCSVDataHandler(DataHandler):
         -------
         Python datetime object for last bar.
         """
-        try:
-            bars_list = self.latest_symbol_data[symbol]
-        except KeyError:
-            print(symbol,"not available in historic data set")
-            raise
-        else:
-            return bars_list[-1][0]
+        i = self._get_cursor(symbol)
+        return self.symbol_data[symbol]['datetime'][i]
 
     def get_latest_bar_value(self, symbol, val_type):
         """
@@ -248,15 +273,10 @@ class HistoricCSVDataHandler(DataHandler):
 
         Returns
         -------
-        Returns one chosen value from pandas Bar series object.
+        Returns one chosen value from the latest bar.
         """
-        try:
-            bars_list = self.latest_symbol_data[symbol]
-        except KeyError:
-            print(symbol,"not available in historic data set")
-            raise
-        else:
-            return getattr(bars_list[-1][1], val_type)
+        i = self._get_cursor(symbol)
+        return self.symbol_data[symbol][val_type][i]
 
     def get_latest_bars_values(self, symbol, val_type, N=1):
         """
@@ -268,31 +288,31 @@ class HistoricCSVDataHandler(DataHandler):
         N (int): optional, number of bars values to return
         Returns
         -------
-        Returns last N chosen values from latest_symbol list, N-k if N not avail.
+        Returns last N chosen values as a read-only view into the column
+        array, N-k if N not avail.
         """
-        try:
-            bars_list = self.get_latest_bars(symbol, N)
-            # print(bars_list)
-        except KeyError:
-            print(symbol,"not available in historic data set")
-            raise
+        i = self._get_cursor(symbol)
+        return self.symbol_data[symbol][val_type][max(0, i - N + 1):i + 1]
 
-        else:
-            #getattr() function lets you obtain the value of an object's attribute
-            return np.array([getattr(b[1], val_type) for b in bars_list])
+    def get_latest_closes(self):
+        """
+        Returns
+        -------
+        Read-only view of the latest close of every symbol, in symbol_list
+        order.
+        """
+        return self.closes[self._get_cursor(self.symbol_list[0])]
 
     def update_bars(self):
         """
-        Moves latest bar to latest_symbol_data structure for every symbol
-        in symbol list and creates a Market Event that gets added to queue
+        Advances the cursor of every symbol in symbol list by one bar and
+        creates a Market Event that gets added to queue. Once the bars run
+        out the backtest is stopped, that last Market Event repeats the
+        final bar.
         """
         for symbol in self.symbol_list:
-            try:
-                bar = next(self._get_new_bar(symbol))
-            except StopIteration:
-                self.continue_backtest = False
+            if self.cursor[symbol] < self.n[symbol] - 1:
+                self.cursor[symbol] += 1
             else:
-                if bar is not None:
-                    self.latest_symbol_data[symbol].append(bar)
-        self.events.put(MarketEvent())
-
+                self.continue_backtest = False
+        self.events.append(MarketEvent())
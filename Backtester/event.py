@@ -1,29 +1,70 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+from enum import IntEnum
+import functools
 
-class Event(object):
+
+class EvType(IntEnum):
+    """
+    Type of an Event, used for dispatching events from the queue
+    """
+    MARKET = 1
+    SIGNAL = 2
+    ORDER = 3
+    FILL = 4
+
+class SigType(IntEnum):
+    """
+    Type of a SignalEvent
+    """
+    LONG = 1
+    SHORT = -1
+    EXIT = 0
+
+class Side(IntEnum):
+    """
+    Direction of an OrderEvent or FillEvent. The value is the sign of the
+    change in position
+    """
+    BUY = 1
+    SELL = -1
+
+class OrderType(IntEnum):
+    """
+    Type of an OrderEvent, market or limit
     """
-    Base parent class for events
+    MKT = 1
+    LMT = 2
+
+
+class Event:
+    """
+    Base parent class for events. Events declare __slots__ so instances
+    carry no per-instance __dict__.
     """
-    pass
+    __slots__ = ('type',)
 
 
 class MarketEvent(Event):
     """
     Receives new market update events
     """
+    __slots__ = ()
+
     def __init__(self):
         """
         No Parameters,
         Identifies a market event
         """
-        self.type = 'MARKET'
+        self.type = EvType.MARKET
 
 class SignalEvent(Event):
     """
     Handles event of sending a Signal from a Stategy object.
     This will be received by a Portfolio object and acted upon.
     """
+    __slots__ = ('strategy_id', 'symbol', 'datetime', 'signal_type', 'strength')
+
     def __init__(self, strategy_id, symbol, datetime, signal_type, strength):
         """
         Parameters
@@ -31,12 +72,12 @@ class SignalEvent(Event):
         strategy_id : ID for the strategy that generated the signal
         symbol (string): Ticker symbol
         datetime : Timestamp when signal was generated
-        signal_type (string): 'SHORT' or 'LONG'
+        signal_type (SigType): SigType.LONG, SigType.SHORT or SigType.EXIT
         strength : Adjustment factor 'suggestion' for scaling quantity at portfolio
         level. Good for pairs strategies
         """
 
-        self.type = 'SIGNAL'
+        self.type = EvType.SIGNAL
         self.strategy_id = strategy_id
         self.symbol = symbol
         self.datetime = datetime
@@ -48,17 +89,20 @@ class OrderEvent(Event):
     Handles sending an Order to an execution system. Order will contain a symbol,
     a type (limit or market), quantity, and a direction.
     """
+    __slots__ = ('symbol', 'order_type', 'quantity', 'direction')
+
     def __init__(self, symbol, order_type, quantity, direction):
         """
         Parameters
         ----------
         symbol (string) : Ticker symbol
-        order_type (string): 'LMT' or 'MKT' for Limit and Market orders
+        order_type (OrderType): OrderType.LMT or OrderType.MKT for Limit and
+        Market orders
         quantity (int): Non-negative int representing quantity
-        direction (string) : 'BUY' or 'SELL' for long and short
+        direction (Side) : Side.BUY or Side.SELL for long and short
         """
 
-        self.type = 'ORDER'
+        self.type = EvType.ORDER
         self.symbol = symbol
         self.order_type = order_type
         self.quantity = quantity
@@ -69,14 +113,26 @@ class OrderEvent(Event):
         Prints attributes of order
         """
         print("order: Symbol = %s, Type = %s, Quantity = %s, Direction = %s"
-              % (self.symbol, self.order_type, self.quantity, self.direction)
+              % (self.symbol, self.order_type.name, self.quantity,
+                 self.direction.name)
               )
 
+@functools.lru_cache(maxsize=1024)
+def _commission_for_qty(quantity):
+    """
+    IBKR Pro-Fixed commission for a quantity of shares. Pure function of the
+    quantity, so it is cached since the same lot sizes are filled repeatedly.
+    """
+    return max(quantity * .005, 1.0)
+
 class FillEvent(Event):
     """
     Generated upon completion of an OrderEvent by ExecutionHandler. Describes
     the quantity and cost of a buy or sell as well as transaction costs.
     """
+    __slots__ = ('timeindex', 'symbol', 'exchange', 'quantity', 'direction',
+                 'fill_dir', 'fill_cost', 'commission')
+
     def __init__(self, timeindex, symbol, exchange, quantity, direction,
                  fill_cost, commission=None):
         """
@@ -86,21 +142,23 @@ class FillEvent(Event):
         symbol (string): Ticker symbol of filled order
         exchange : Exchange where order was filled
         quantity (int): Filled quantity
-        direction (string): 'BUY' or 'SELL', direction of fill
+        direction (Side): Side.BUY or Side.SELL, direction of fill. Its value
+        is stored as fill_dir as well, +1 for BUY and -1 for SELL
         fill_cost : Holdings value (in dollars)
         commission (float) : Optional, if None: commission will be Interactive
         Brokers 'IBKR Pro-Fixed' rate of .005 per share or minimum 1.00
         """
-        self.type = 'FILL'
+        self.type = EvType.FILL
         self.timeindex = timeindex
         self.symbol = symbol
         self.exchange = exchange
         self.quantity = quantity
         self.direction = direction
+        self.fill_dir = int(direction)
         self.fill_cost = fill_cost
 
         if commission is None:
-            self.commission = self.calculate_commission()
+            self.commission = _commission_for_qty(quantity)
         else:
             self.commission = commission
 
@@ -111,10 +169,7 @@ class FillEvent(Event):
 
         returns a float
         """
-        if self.quantity * .005 > 1:
-            return self.quantity * .005
-        else:
-            return 1.0
+        return _commission_for_qty(self.quantity)
 
 
 
@@ -2,8 +2,7 @@
 # -*- coding: utf-8 -*-
 from abc import ABCMeta, abstractmethod
 import datetime
-import queue
-from event import FillEvent, OrderEvent
+from event import EvType, FillEvent, OrderEvent
 
 
 
@@ -64,12 +63,12 @@ class SimulatedExecutionHandler(ExecutionHandler):
         ----------
         event : Contains an Event object with order info.
         """
-        if event.type == 'ORDER':
+        if event.type == EvType.ORDER:
             #ARCA is the exchange and NONE is for fill_cost since cost of fill
             #already in Portfolio. Can improve engine with a model using "current" data
             #realistic fill here
             fill_event = FillEvent( datetime.datetime.utcnow(), event.symbol,
                                    'Exchange Name', event.quantity, event.direction, None)
 
-            self.events.put(fill_event)
+            self.events.append(fill_event)
 
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Optional Numba support for numeric kernels.
+
+When Numba is installed njit is Numba's own. Otherwise it is a decorator that
+returns the function unchanged, so the kernels still run as plain Python (just
+slower).
+"""
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """
+        Stand-in for numba.njit, usable both as @njit and @njit(...)
+        """
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
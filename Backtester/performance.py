@@ -12,6 +12,8 @@ and market value of the holdings. Should be thought of as an estimate.
 import numpy as np
 import pandas as pd
 
+from jit import njit
+
 def create_sharpe_ratio(returns, periods=252):
     """
     Parameters
@@ -25,26 +27,133 @@ def create_sharpe_ratio(returns, periods=252):
     """
     return (np.sqrt(periods) * ((np.mean(returns)))) / np.std(returns)
 
-def create_drawdowns(pnl):
+def create_drawdowns(pnl, return_series=False):
     """
     Calculates biggest peak-to-trough drawdown on the PnL curve and its duration.
 
     Parameters
     ----------
     pnl : Pandas Series representing period % returns
+    return_series (bool) : optional, also return the drawdown of every bar
+        default = False
+
+    Returns
+    -------
+    max drawdown, max duration. With return_series the drawdown Series is
+    returned first: drawdown, max drawdown, max duration
+    """
+    #High water mark starts at 0 and the first bar is skipped, each step
+    #is a cumulative max instead of a Python loop over the bars
+    pnl_arr = pnl.to_numpy(dtype=np.float64)
+    n = len(pnl_arr)
+    hwm = np.fmax.accumulate(np.concatenate(([0.0], pnl_arr[1:])))
+    dd = hwm - pnl_arr
+    dd[:1] = np.nan
+
+    #Duration counts bars since the drawdown was last 0, bars before the
+    #first 0 stay NaN
+    bars = np.arange(n)
+    at_hwm = dd == 0
+    last_hwm = np.maximum.accumulate(np.where(at_hwm, bars, 0))
+    dur = np.where(np.logical_or.accumulate(at_hwm), bars - last_hwm, np.nan)
+
+    #NaN skipping max, NaN when there are no values
+    max_dd = np.fmax.reduce(dd, initial=np.nan)
+    max_dur = np.fmax.reduce(dur, initial=np.nan)
+    if return_series:
+        return pd.Series(dd, index=pnl.index), max_dd, max_dur
+    return max_dd, max_dur
+
+
+@njit(cache=True)
+def _summary_stats_kernel(returns, periods, drawdown):
+    """
+    Sharpe ratio and drawdowns of a returns series in a single pass. The
+    equity curve is rebuilt from the returns as it goes, NaN returns are left
+    out of the mean/std and of the equity product like pandas skips them.
+    Drawdowns follow create_drawdowns(): the high water mark starts at 0, the
+    first bar is skipped and durations are NaN until the first 0 drawdown.
+
+    Parameters
+    ----------
+    returns : NumPy array of period % returns
+    periods : Periods per year used to annualise the Sharpe Ratio
+    drawdown : Array of the same length filled with the drawdown of each bar,
+        or an empty array to skip storing them
 
     Returns
     -------
-    drawdown, duration
+    sharpe, max drawdown, max duration
     """
-    hwm = [0]
-    idx = pnl.index
-    drawdown = pd.Series(index = idx)
-    duration = pd.Series(index = idx)
+    n = returns.shape[0]
+    store = drawdown.shape[0] == n
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    equity = 1.0
+    hwm = 0.0
+    max_dd = np.nan
+    dur = np.nan
+    max_dur = np.nan
 
-    for t in range(1, len(idx)):
-        hwm.append(max(hwm[t-1], pnl.iloc[t]))
-        drawdown.iloc[t]= (hwm[t]-pnl.iloc[t])
-        duration.iloc[t]= (0 if drawdown.iloc[t] ==0 else duration.iloc[t-1]+1)
-    return drawdown, drawdown.max(), duration.max()
+    for t in range(n):
+        r = returns[t]
+        if r == r:
+            #Welford's update for the mean and variance
+            count += 1
+            delta = r - mean
+            mean += delta / count
+            m2 += delta * (r - mean)
+            equity *= 1.0 + r
+            pnl = equity
+        else:
+            pnl = np.nan
 
+        if t == 0:
+            if store:
+                drawdown[t] = np.nan
+            continue
+        if pnl > hwm:
+            hwm = pnl
+        dd = hwm - pnl
+        if store:
+            drawdown[t] = dd
+        if dd == 0:
+            dur = 0.0
+        else:
+            dur = dur + 1.0
+        if dd > max_dd or max_dd != max_dd:
+            max_dd = dd
+        if dur > max_dur or max_dur != max_dur:
+            max_dur = dur
+
+    std = np.sqrt(m2 / count) if count > 0 else np.nan
+    if std > 0:
+        sharpe = np.sqrt(periods) * mean / std
+    else:
+        sharpe = np.nan
+    return sharpe, max_dd, max_dur
+
+def create_summary_stats(returns, periods=252, return_drawdown=False):
+    """
+    Calculates the Sharpe Ratio and the drawdowns of the equity curve of a
+    returns series in one compiled pass, see _summary_stats_kernel().
+
+    Parameters
+    ----------
+    returns : Pandas Series representing period % returns.
+    periods : default is Daily (252). Houry (252* 6.5), Minute(252*6.5*60)
+    return_drawdown (bool) : optional, also return the drawdown of every bar
+        default = False
+
+    Returns
+    -------
+    sharpe, max drawdown, max duration. With return_drawdown the drawdown
+    Series follows the sharpe: sharpe, drawdown, max drawdown, max duration
+    """
+    r = returns.to_numpy(dtype=np.float64)
+    dd = np.empty(len(r) if return_drawdown else 0)
+    sharpe, max_dd, max_dur = _summary_stats_kernel(r, float(periods), dd)
+    if return_drawdown:
+        return sharpe, pd.Series(dd, index=returns.index), max_dd, max_dur
+    return sharpe, max_dd, max_dur
@@ -6,6 +6,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 import pandas as pd
 
+from performance import create_drawdowns
+
 if __name__ == "__main__":
     data = pd.io.parsers.read_csv("equity.csv", header=0, parse_dates=True,
                                   index_col=0).sort_values(by='datetime')
@@ -26,9 +28,11 @@ if __name__ == "__main__":
     data['returns'].plot(ax=ax2, color='black', lw=2.)
     plt.grid(True)
 
-    #Plot the returns
+    #Plot the drawdowns, derived from the equity curve (equity.csv doesn't
+    #store them)
+    drawdown = create_drawdowns(data['equity_curve'], return_series=True)[0]
     ax3 = fig.add_subplot(313, ylabel='Drawdowns, %')
-    data['drawdown'].plot(ax=ax3, color='red', lw=2.)
+    drawdown.plot(ax=ax3, color='red', lw=2.)
     plt.grid(True)
 
     plt.show()
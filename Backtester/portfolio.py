@@ -7,12 +7,11 @@ directly to "brokerage" with predetermined sizing
 
 import datetime
 from math import floor
-import queue
 import numpy as np
 import pandas as pd
 
-from event import FillEvent, OrderEvent
-from performance import create_sharpe_ratio, create_drawdowns
+from event import EvType, FillEvent, OrderEvent, OrderType, Side, SigType
+from performance import create_summary_stats
 
 class Portfolio(object):
     """
@@ -155,15 +154,8 @@ class Portfolio(object):
         ----------
         fill : Fill object to update positions with
         """
-        #Check whether fill is buy or sell
-        fill_dir = 0
-        if fill.direction == 'BUY':
-            fill_dir = 1
-        if fill.direction == 'SELL':
-            fill_dir = -1
-
         #Update positions list with new quantities
-        self.current_positions[fill.symbol] += fill_dir*fill.quantity
+        self.current_positions[fill.symbol] += fill.fill_dir*fill.quantity
 
     def update_holdings_from_fill(self, fill):
         """
@@ -179,16 +171,9 @@ class Portfolio(object):
         ----------
         fill : Fill object to update holdings with.
         """
-        #Check whether fill is buy or sell
-        fill_dir = 0
-        if fill.direction == 'BUY':
-            fill_dir = 1
-        if fill.direction == 'SELL':
-            fill_dir = -1
-
         #Update holdings list with new quantities
         fill_cost = self.bars.get_latest_bar_value(fill.symbol, "close")
-        cost = fill_dir * fill_cost * fill.quantity
+        cost = fill.fill_dir * fill_cost * fill.quantity
         self.current_holdings[fill.symbol] += cost
         self.current_holdings['commission'] += fill.commission
         self.current_holdings['cash'] -= (cost + fill.commission)
@@ -203,7 +188,7 @@ class Portfolio(object):
         ----------
         event : FillEvent object
         """
-        if event.type == 'FILL':
+        if event.type == EvType.FILL:
             self.update_positions_from_fill(event)
             self.update_holdings_from_fill(event)
 
@@ -228,17 +213,17 @@ class Portfolio(object):
 
         mkt_quantity = 100
         cur_quantity = self.current_positions[symbol]
-        order_type = 'MKT'
+        order_type = OrderType.MKT
 
-        if direction == 'LONG' and cur_quantity == 0:
-            order = OrderEvent(symbol, order_type, mkt_quantity, 'BUY')
-        if direction == 'SHORT' and cur_quantity == 0:
-            order = OrderEvent(symbol, order_type, mkt_quantity, 'SELL')
+        if direction == SigType.LONG and cur_quantity == 0:
+            order = OrderEvent(symbol, order_type, mkt_quantity, Side.BUY)
+        if direction == SigType.SHORT and cur_quantity == 0:
+            order = OrderEvent(symbol, order_type, mkt_quantity, Side.SELL)
 
-        if direction == 'EXIT' and cur_quantity > 0:
-            order = OrderEvent(symbol, order_type, abs(cur_quantity), 'SELL')
-        if direction == 'EXIT' and cur_quantity < 0:
-             order = OrderEvent(symbol, order_type, abs(cur_quantity), 'BUY')
+        if direction == SigType.EXIT and cur_quantity > 0:
+            order = OrderEvent(symbol, order_type, abs(cur_quantity), Side.SELL)
+        if direction == SigType.EXIT and cur_quantity < 0:
+             order = OrderEvent(symbol, order_type, abs(cur_quantity), Side.BUY)
         return order
 
     def update_signal(self, event):
@@ -249,9 +234,9 @@ class Portfolio(object):
         ----------
         event : SignalEvent object
         """
-        if event.type == 'SIGNAL':
+        if event.type == EvType.SIGNAL:
             order_event = self.generate_naive_order(event)
-            self.events.put(order_event)
+            self.events.append(order_event)
 
     def create_equity_curve_dataframe(self):
         """
@@ -277,11 +262,10 @@ class Portfolio(object):
         """
         total_return = self.equity_curve['equity_curve'].iloc[-1]
         returns = self.equity_curve['returns']
-        pnl = self.equity_curve['equity_curve']
 
-        sharpe_ratio = create_sharpe_ratio(returns, periods=252)#Change periods for dif. strats
-        drawdown, max_dd, dd_duration = create_drawdowns(pnl)
-        self.equity_curve['drawdown'] = drawdown
+        #Sharpe ratio and drawdowns of the equity curve in a single pass
+        sharpe_ratio, max_dd, dd_duration = create_summary_stats(
+            returns, periods=252)#Change periods for dif. strats
 
         stats = [("Total Return", "%0.2f%%" % ((total_return - 1.0)*100.0)), \
                  ("Sharpe Ratio", "%0.2f" % sharpe_ratio),
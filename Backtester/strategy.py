@@ -10,7 +10,6 @@ generating SignalEvent objects
 
 from abc import ABCMeta, abstractmethod
 import datetime
-import queue
 import numpy as np
 import pandas as pd
 from event import SignalEvent
@@ -104,6 +104,15 @@ class DataHandler(object):
         """
         raise NotImplementedError("Implement get_latest_bars_values()")
 
+    @abstractmethod
+    def get_latest_closes(self):
+        """
+        Returns
+        -------
+        NumPy vector of the latest close of every symbol, in symbol_list order
+        """
+        raise NotImplementedError("Implement get_latest_closes()")
+
     @abstractmethod
     def update_bars(self):
         """
@@ -118,6 +127,10 @@ class HistoricCSVDataHandlerHFT(DataHandler):
     For reading CSV files for each symbol requested from disk and providing a
     structure to obtain the latest bar in a manner that should replicate a live
     trading interface
+
+    Bars are stored column-wise (one contiguous NumPy array per field) and the
+    "latest" bar of each symbol is tracked with an integer cursor into those
+    arrays, so no per-bar row objects are created during the backtest.
     """
     def __init__(self, events, csv_dir, symbol_list):
         """
@@ -131,58 +144,117 @@ class HistoricCSVDataHandlerHFT(DataHandler):
         self.csv_dir = csv_dir
         self.symbol_list = symbol_list
         self.symbol_data = {}
-        self.latest_symbol_data = {}
+        self.cursor = {}
+        self.n = {}
         self.continue_backtest = True
         self._open_convert_csv_files()
 
     def _open_convert_csv_files(self):
         """
-        Opens CSV files from the data directory,converts them into pandas
-        DataFrames within a symbol dictionary.
+        Opens CSV files from the data directory, converts them into pandas
+        DataFrames and then into a dictionary of NumPy column arrays for each
+        symbol ('datetime', 'open', 'high', 'low', 'close', 'volume').
         For this handler it will be assumed that the data is
         taken from Yahoo. Thus its format will be respected.
         """
-        comb_index = None
+        frames = {}
 
         for s in self.symbol_list:
-            # Load the CSV file with no header information, indexed on date
-            self.symbol_data[s] = pd.io.parsers.read_csv(
-                os.path.join(self.csv_dir, '%s.csv' % s),
-                header=0, index_col=0, parse_dates=True,
-
-                #names list edited for Nasdaq source
-                names=['datetime', 'open', 'high','low', 'close', 'volume']
-            ).sort_values(by='datetime') #Updated sorting method
-
-
-            # Index combined to pad forward values
-            if comb_index is None:
-                comb_index = self.symbol_data[s].index
-            else:
-                comb_index.union(self.symbol_data[s].index)
-
-            # Set the latest symbol_data to None
-            self.latest_symbol_data[s] = []
-
-        # Reindex the dataframes
+            frames[s] = self._load_symbol_frame(s)
+
+        # Index combined to pad forward values. Index.union returns a new
+        # index, it doesn't update comb_index in place. Symbols traded on the
+        # same exchange/hours usually share the exact same index, in which
+        # case the union and reindexing are skipped
+        indexes = [frames[s].index for s in self.symbol_list]
+        aligned = all(idx.equals(indexes[0]) for idx in indexes[1:])
+        comb_index = indexes[0]
+        if not aligned:
+            for idx in indexes[1:]:
+                comb_index = comb_index.union(idx)
+
+        # Reindex the dataframes and split them into contiguous column arrays.
+        # Volume is kept as float64 since padding can introduce NaNs
         for s in self.symbol_list:
-            self.symbol_data[s] = self.symbol_data[s].\
-                reindex(index=comb_index, method='pad').iterrows()
-
-    def _get_new_bar(self, symbol):
+            df = frames[s]
+            if not aligned:
+                df = df.reindex(index=comb_index, method='pad')
+            cols = {'datetime': df.index.values.astype('datetime64[ns]')}
+            for col in ('open', 'high', 'low', 'close', 'volume'):
+                cols[col] = df[col].to_numpy(np.float64)
+            for arr in cols.values():
+                arr.setflags(write=False)
+            self.symbol_data[s] = cols
+            self.cursor[s] = -1
+            self.n[s] = len(df)
+
+        # Closes of all symbols side by side, one row per bar. All symbols
+        # share the combined index so their cursors always move together
+        self.closes = np.column_stack(
+            [self.symbol_data[s]['close'] for s in self.symbol_list])
+        self.closes.setflags(write=False)
+
+    def _load_symbol_frame(self, symbol):
         """
+        Loads the bars of a symbol into a DataFrame indexed on datetime.
+
+        The parsed CSV is cached in a '.npz' file next to it, which is used
+        instead of the CSV on later runs as long as it is newer than the CSV.
+
         Parameters
         ----------
         symbol (str): Ticker symbol
 
         Returns
         -------
-        Latest bar from data feed
+        DataFrame with open, high, low, close, volume columns
         """
-        for bar in self.symbol_data[symbol]:
-            yield bar
-
-    def get_latest_bar(self, symbol):
+        csv_path = os.path.join(self.csv_dir, '%s.csv' % symbol)
+        cache_path = csv_path + '.npz'
+
+        if os.path.exists(cache_path) and \
+                os.path.getmtime(cache_path) >= os.path.getmtime(csv_path):
+            with np.load(cache_path, allow_pickle=False) as data:
+                return pd.DataFrame(
+                    {col: data[col] for col in
+                     ('open', 'high', 'low', 'close', 'volume')},
+                    index=pd.DatetimeIndex(data['datetime'], name='datetime'))
+
+        # Load the CSV file with no header information, indexed on date.
+        # Fixed columns and dtypes let the C parser skip type inference,
+        # volume is read as float64 like the column arrays store it
+        columns = ['datetime', 'open', 'high', 'low', 'close', 'volume']
+        df = pd.io.parsers.read_csv(
+            csv_path,
+            header=0, index_col='datetime', parse_dates=['datetime'],
+            cache_dates=True, engine='c',
+
+            #names list edited for Nasdaq source
+            names=columns, usecols=columns,
+            dtype=dict((col, np.float64) for col in columns[1:])
+        )
+        #Only sort when the file isn't already chronological. The cache is
+        #written sorted, so loading from it never needs a sort
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index()
+
+        #Written to a temporary file first so a concurrent run never reads a
+        #partial cache file. The cache is only an optimisation, so a data
+        #directory that can't be written to just means it isn't used
+        tmp_path = '%s.%d.tmp' % (cache_path, os.getpid())
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f,
+                         datetime=df.index.values.astype('datetime64[ns]'),
+                         **{col: df[col].to_numpy() for col in
+                            ('open', 'high', 'low', 'close', 'volume')})
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return df
+
+    def _get_cursor(self, symbol):
         """
         Parameters
         ----------
@@ -190,15 +262,25 @@ class HistoricCSVDataHandlerHFT(DataHandler):
 
         Returns
         -------
-        Last bar from the latest_symbol list
+        Index of the latest bar in the symbol's column arrays
         """
         try:
-            bars_list = self.latest_symbol_data[symbol]
+            return self.cursor[symbol]
         except KeyError:
             print(symbol,"not available in historic data set")
             raise
-        else:
-            return bars_list[-1]
+
+    def get_latest_bar(self, symbol):
+        """
+        Parameters
+        ----------
+        symbol (str): Ticker symbol
+
+        Returns
+        -------
+        Last bar as a tuple of (datetime, open, high, low, close, volume)
+        """
+        return self.get_latest_bars(symbol)[-1]
 
     def get_latest_bars(self, symbol, N=1):
         """
@@ -209,15 +291,14 @@ class HistoricCSVDataHandlerHFT(DataHandler):
 
         Returns
         -------
-        Last N bars from the latest_symbol list, or N-k if N not available
+        Last N bars as (datetime, open, high, low, close, volume) tuples,
+        or N-k if N not available
         """
-        try:
-            bars_list = self.latest_symbol_data[symbol]
-        except KeyError:
-            print(symbol,"not available in historic data set")
-            raise
-        else:
-            return bars_list[-N:]
+        i = self._get_cursor(symbol)
+        start = max(0, i - N + 1)
+        cols = self.symbol_data[symbol]
+        return list(zip(*(cols[c][start:i + 1] for c in
+                          ('datetime', 'open', 'high', 'low', 'close', 'volume'))))
 
     def get_latest_bar_datetime(self, symbol):
         """
@@ -227,15 +308,10 @@ class HistoricCSVDataHandlerHFT(DataHandler):
 
         Returns
         -------
-        Python datetime object for last bar.
+        numpy datetime64 object for last bar.
         """
-        try:
-            bars_list = self.latest_symbol_data[symbol]
-        except KeyError:
-            print(symbol,"not available in historic data set")
-            raise
-        else:
-            return bars_list[-1][0]
+        i = self._get_cursor(symbol)
+        return self.symbol_data[symbol]['datetime'][i]
 
     def get_latest_bar_value(self, symbol, val_type):
         """
@@ -247,15 +323,10 @@ class HistoricCSVDataHandlerHFT(DataHandler):
 
         Returns
         -------
-        Returns one chosen value from pandas Bar series object.
+        Returns one chosen value from the latest bar.
         """
-        try:
-            bars_list = self.latest_symbol_data[symbol]
-        except KeyError:
-            print(symbol,"not available in historic data set")
-            raise
-        else:
-            return getattr(bars_list[-1][1], val_type)
+        i = self._get_cursor(symbol)
+        return self.symbol_data[symbol][val_type][i]
 
     def get_latest_bars_values(self, symbol, val_type, N=1):
         """
@@ -267,31 +338,45 @@ class HistoricCSVDataHandlerHFT(DataHandler):
         N (int): optional, number of bars values to return
         Returns
         -------
-        Returns last N chosen values from latest_symbol list, N-k if N not avail.
+        Returns last N chosen values as a read-only view into the column
+        array, N-k if N not avail.
         """
-        try:
-            bars_list = self.get_latest_bars(symbol, N)
-            # print(bars_list)
-        except KeyError:
-            print(symbol,"not available in historic data set")
-            raise
+        i = self._get_cursor(symbol)
+        return self.symbol_data[symbol][val_type][max(0, i - N + 1):i + 1]
 
-        else:
-            #getattr() function lets you obtain the value of an object's attribute
-            return np.array([getattr(b[1], val_type) for b in bars_list])
+    def get_latest_closes(self):
+        """
+        Returns
+        -------
+        Read-only view of the latest close of every symbol, in symbol_list
+        order.
+        """
+        return self.closes[self._get_cursor(self.symbol_list[0])]
+
+    def get_window_edge_values(self, symbol, val_type, N):
+        """
+        Parameters
+        ----------
+        symbol (str): Ticker symbol
+        val_type (str): Which val to return ('open', 'high', 'close', etc)
+        N (int): Size of the rolling window
+
+        Returns
+        -------
+        Tuple of (newest value, value that just left the N bar window). The
+        second value is None while fewer than N bars have been updated.
+        """
+        i = self._get_cursor(symbol)
+        arr = self.symbol_data[symbol][val_type]
+        return arr[i], (arr[i - N] if i >= N else None)
 
     def update_bars(self):
         """
-        Moves latest bar to latest_symbol_data strcture for every symbol
-        in symbol list and creates a Market Event that gets added to queue
+        Advances the cursor of every symbol in symbol list by one bar and
+        creates a Market Event that gets added to queue
         """
         for symbol in self.symbol_list:
-            try:
-                bar = next(self._get_new_bar(symbol))
-            except StopIteration:
+            self.cursor[symbol] += 1
+            if self.cursor[symbol] >= self.n[symbol] - 1:
                 self.continue_backtest = False
-            else:
-                if bar is not None:
-                    self.latest_symbol_data[symbol].append(bar)
-        self.events.put(MarketEvent())
-
+        self.events.append(MarketEvent())
@@ -7,12 +7,11 @@ directly to "brokerage" with predetermined sizing
 
 import datetime
 from math import floor
-import queue
 import numpy as np
 import pandas as pd
 
-from event import FillEvent, OrderEvent
-from performance import create_sharpe_ratio, create_drawdowns
+from event import EvType, FillEvent, OrderEvent, OrderType, Side, SigType
+from performance import create_summary_stats
 
 class PortfolioHFT(object):
     """
@@ -43,59 +42,69 @@ class PortfolioHFT(object):
         self.start_date = start_date
         self.initial_capital = initial_capital
 
+        #History is preallocated, one row for the start date plus one per bar
+        self.n_bars = self.bars.n[self.symbol_list[0]]
+        self.holdings_columns = list(self.symbol_list) + \
+            ['cash', 'commission', 'total']
+        self.row = 1
+        self.all_datetimes = np.empty(self.n_bars + 1, dtype='datetime64[ns]')
+        self.all_datetimes[0] = np.datetime64(self.start_date, 'ns')
+
+        #Column of each symbol in the position/holdings vectors and matrices
+        self.sym_idx = dict((s, i) for i, s in enumerate(self.symbol_list))
+
         self.all_positions = self.construct_all_positions()
-        self.current_positions = dict( (k,v) for k, v in \
-                                      [(s,0) for s in self.symbol_list] )
+        self.current_positions = np.zeros(len(self.symbol_list), dtype=np.int64)
         self.all_holdings = self.construct_all_holdings()
         self.current_holdings = self.construct_current_holdings()
+        self.current_holdings_sym = np.zeros(len(self.symbol_list))
 
     def construct_all_positions(self):
         """
-        Creates a dictionary for each symbol, sets value to 0 for each, and
-        adds a datetime key. Then wraps it in a list. Uses start_date to decide
-        when the time index begins
+        Creates the positions matrix, one row per bar and one column per
+        symbol. The first row represents start_date with every position at 0.
 
         Returns
         -------
-        list containing dictionary of all symbols and value at 0
+        2-D int64 array of positions, shape (n_bars + 1, n_symbols)
         """
-        d = dict( (k,v) for k, v in [(s, 0) for s in self.symbol_list] )
-        d['datetime'] = self.start_date
-        return [d]
+        return np.zeros((self.n_bars + 1, len(self.symbol_list)),
+                        dtype=np.int64)
 
     def construct_all_holdings(self):
         """
-        Constructs the holdings list using start_date to determine beggining of
-        time index
-
-        'cash' key represents spare cash in account after a purchase
-        'commission' key represents cumulative commission accrued
-        'total' key represents the total account equity including cash/any open
+        Constructs the holdings matrix, one row per bar. The first row
+        represents start_date.
+
+        Columns are each symbol followed by 'cash', 'commission' and 'total'
+        (see holdings_columns).
+        'cash' represents spare cash in account after a purchase
+        'commission' represents cumulative commission accrued
+        'total' represents the total account equity including cash/any open
         positions
         Short positions treated as negative. Starting cash and total are set to
         initial capital
 
         Returns
         -------
-        list containing dictionary with symbols and values (0) and 4 other entries
+        2-D float64 array of holdings, shape (n_bars + 1, n_symbols + 3)
         """
-        d = dict( (k,v) for k, v in [(s, 0) for s in self.symbol_list] )
-        d['datetime'] = self.start_date
-        d['cash'] = self.initial_capital
-        d['commission'] = 0.0
-        d['total'] = self.initial_capital
-        return [d]
+        holdings = np.zeros((self.n_bars + 1, len(self.holdings_columns)))
+        holdings[0, -3] = self.initial_capital
+        holdings[0, -1] = self.initial_capital
+        return holdings
 
     def construct_current_holdings(self):
         """
-        Constructs dictionary to hold instantaneous value of the portfolio
-        across all symbols.
+        Constructs dictionary to hold instantaneous cash, commission and total
+        value of the portfolio. Per symbol holdings are kept in the
+        current_holdings_sym vector (indexed through sym_idx).
 
         Returns
         -------
-        Dictionary of portfolio value across symbol
+        Dictionary of portfolio cash, commission and total
         """
-        d = dict( (k,v) for k, v in [(s, 0.0) for s in self.symbol_list])
+        d = {}
         d['cash'] = self.initial_capital
         d['commission'] = 0.0
         d['total'] = self.initial_capital
@@ -119,33 +128,21 @@ class PortfolioHFT(object):
         event : ...
         """
         latest_datetime = self.bars.get_latest_bar_datetime(self.symbol_list[0])
+        row = self.row
+        self.all_datetimes[row] = latest_datetime
 
         #Update positions
-        dp = dict( (k,v) for k,v in [(s,0) for s in self.symbol_list] )
-        dp['datetime'] = latest_datetime
+        self.all_positions[row] = self.current_positions
 
-        for s in self.symbol_list:
-            dp[s] = self.current_positions[s]
+        #Update holdings, market value is an approximation to the real value
+        market_value = self.current_positions * self.bars.get_latest_closes()
 
-        #Append current positions
-        self.all_positions.append(dp)
-
-        #Update holdings
-        dh = dict( (k,v) for k,v in [(s,0) for s in self.symbol_list] )
-        dh['datetime'] = latest_datetime
-        dh['cash'] = self.current_holdings['cash']
-        dh['commission'] = self.current_holdings['commission']
-        dh['total'] = self.current_holdings['cash']
-
-        for s in self.symbol_list:
-            #Approximation to the real value
-            market_value = self.current_positions[s] * \
-                self.bars.get_latest_bar_value(s, "close")
-            dh[s] = market_value
-            dh['total'] += market_value
-
-        #Append current holdings
-        self.all_holdings.append(dh)
+        holdings = self.all_holdings[row]
+        holdings[:-3] = market_value
+        holdings[-3] = self.current_holdings['cash']
+        holdings[-2] = self.current_holdings['commission']
+        holdings[-1] = self.current_holdings['cash'] + market_value.sum()
+        self.row += 1
 
     def update_positions_from_fill(self,fill):
         """
@@ -155,15 +152,8 @@ class PortfolioHFT(object):
         ----------
         fill : Fill object to update positions with
         """
-        #Check whether fill is buy or sell
-        fill_dir = 0
-        if fill.direction == 'BUY':
-            fill_dir = 1
-        if fill.direction == 'SELL':
-            fill_dir = -1
-
         #Update positions list with new quantities
-        self.current_positions[fill.symbol] += fill_dir*fill.quantity
+        self.current_positions[self.sym_idx[fill.symbol]] += fill.fill_dir*fill.quantity
 
     def update_holdings_from_fill(self, fill):
         """
@@ -179,17 +169,10 @@ class PortfolioHFT(object):
         ----------
         fill : Fill object to update holdings with.
         """
-        #Check whether fill is buy or sell
-        fill_dir = 0
-        if fill.direction == 'BUY':
-            fill_dir = 1
-        if fill.direction == 'SELL':
-            fill_dir = -1
-
         #Update holdings list with new quantities
         fill_cost = self.bars.get_latest_bar_value(fill.symbol, "close")
-        cost = fill_dir * fill_cost * fill.quantity
-        self.current_holdings[fill.symbol] += cost
+        cost = fill.fill_dir * fill_cost * fill.quantity
+        self.current_holdings_sym[self.sym_idx[fill.symbol]] += cost
         self.current_holdings['commission'] += fill.commission
         self.current_holdings['cash'] -= (cost + fill.commission)
         self.current_holdings['total'] -= (cost + fill.commission)
@@ -203,7 +186,7 @@ class PortfolioHFT(object):
         ----------
         event : FillEvent object
         """
-        if event.type == 'FILL':
+        if event.type == EvType.FILL:
             self.update_positions_from_fill(event)
             self.update_holdings_from_fill(event)
 
@@ -227,18 +210,18 @@ class PortfolioHFT(object):
         strength = signal.strength
 
         mkt_quantity = 100
-        cur_quantity = self.current_positions[symbol]
-        order_type = 'MKT'
-
-        if direction == 'LONG' and cur_quantity == 0:
-            order = OrderEvent(symbol, order_type, mkt_quantity, 'BUY')
-        if direction == 'SHORT' and cur_quantity == 0:
-            order = OrderEvent(symbol, order_type, mkt_quantity, 'SELL')
-
-        if direction == 'EXIT' and cur_quantity > 0:
-            order = OrderEvent(symbol, order_type, abs(cur_quantity), 'SELL')
-        if direction == 'EXIT' and cur_quantity < 0:
-             order = OrderEvent(symbol, order_type, abs(cur_quantity), 'BUY')
+        cur_quantity = int(self.current_positions[self.sym_idx[symbol]])
+        order_type = OrderType.MKT
+
+        if direction == SigType.LONG and cur_quantity == 0:
+            order = OrderEvent(symbol, order_type, mkt_quantity, Side.BUY)
+        if direction == SigType.SHORT and cur_quantity == 0:
+            order = OrderEvent(symbol, order_type, mkt_quantity, Side.SELL)
+
+        if direction == SigType.EXIT and cur_quantity > 0:
+            order = OrderEvent(symbol, order_type, abs(cur_quantity), Side.SELL)
+        if direction == SigType.EXIT and cur_quantity < 0:
+             order = OrderEvent(symbol, order_type, abs(cur_quantity), Side.BUY)
         return order
 
     def update_signal(self, event):
@@ -249,20 +232,37 @@ class PortfolioHFT(object):
         ----------
         event : SignalEvent object
         """
-        if event.type == 'SIGNAL':
+        if event.type == EvType.SIGNAL:
             order_event = self.generate_naive_order(event)
-            self.events.put(order_event)
+            self.events.append(order_event)
 
     def create_equity_curve_dataframe(self):
         """
-        Creates a pandas DataFrame from the all_holdings list of dictionaries.
-        This is a returns stream that can be used for performance calculations,
-        Eq curve will be normalized to % based, hence initial size equal to 1
+        Creates a pandas DataFrame wrapping the filled rows of the holdings
+        matrix. This is a returns stream that can be used for performance
+        calculations, Eq curve will be normalized to % based, hence initial
+        size equal to 1
         """
-        curve = pd.DataFrame(self.all_holdings)
-        curve.set_index('datetime', inplace=True)
-        curve['returns'] = curve['total'].pct_change()
-        curve['equity_curve'] = (1.0+curve['returns']).cumprod()
+        #Returns and equity are computed in one NumPy pass over the total
+        #column, the DataFrame is only built once at the end
+        total = self.all_holdings[:self.row, -1]
+        returns = np.empty_like(total)
+        returns[0] = np.nan
+        np.divide(np.diff(total), total[:-1], out=returns[1:])
+        #NaN returns (bars padded in before a symbol's first bar) are
+        #skipped in the product and left NaN, as pandas cumprod does
+        missing = np.isnan(returns[1:])
+        equity = np.empty_like(total)
+        equity[0] = 1.0
+        np.cumprod(np.where(missing, 1.0, 1.0 + returns[1:]), out=equity[1:])
+        equity[1:][missing] = np.nan
+
+        curve = pd.DataFrame(self.all_holdings[:self.row],
+                             index=pd.DatetimeIndex(
+                                 self.all_datetimes[:self.row], name='datetime'),
+                             columns=self.holdings_columns, copy=False)
+        curve['returns'] = returns
+        curve['equity_curve'] = equity
         self.equity_curve = curve
 
     def output_summary_stats(self):
@@ -277,11 +277,10 @@ class PortfolioHFT(object):
         """
         total_return = self.equity_curve['equity_curve'].iloc[-1]
         returns = self.equity_curve['returns']
-        pnl = self.equity_curve['equity_curve']
 
-        sharpe_ratio = create_sharpe_ratio(returns, periods=252*6.5*60)#Change periods for dif. strats
-        drawdown, max_dd, dd_duration = create_drawdowns(pnl)
-        self.equity_curve['drawdown'] = drawdown
+        #Sharpe ratio and drawdowns of the equity curve in a single pass
+        sharpe_ratio, max_dd, dd_duration = create_summary_stats(
+            returns, periods=252*6.5*60)#Change periods for dif. strats
 
         stats = [("Total Return", "%0.2f%%" % ((total_return - 1.0)*100.0)), \
                  ("Sharpe Ratio", "%0.2f" % sharpe_ratio),
@@ -7,16 +7,109 @@ import datetime
 
 import numpy as np
 import pandas as pd
-import statsmodels.api as sm
 
 from strategy import Strategy
-from event import SignalEvent
+from event import EvType, SignalEvent, SigType
+from jit import njit
 from backtest import Backtest
 from hft_data import HistoricCSVDataHandlerHFT
 from hft_portfolio import PortfolioHFT
 from execution import SimulatedExecutionHandler
 
 
+@njit(cache=True)
+def run_mr(y, x, window, zscore_low, zscore_high):
+    """
+    Runs the rolling OLS mean reversion signal logic over the whole close
+    series of a pair in one compiled loop. The hedge ratio and zscore use the
+    same running sums as IntradayOLSMRStrategy, recomputed every window bars.
+
+    Parameters
+    ----------
+    y : Close prices of the first symbol of the pair
+    x : Close prices of the second symbol of the pair
+    window : OLS lookback in bars
+    zscore_low : zscore exit threshold
+    zscore_high : zscore entry threshold
+
+    Returns
+    -------
+    Arrays for each bar with a signal pair: the bar index, the SigType values
+    for y and x, the strength of the x signal and the hedge ratio
+    """
+    n = y.shape[0]
+    bar_idx = np.empty(n, np.int64)
+    y_dir = np.empty(n, np.int8)
+    x_dir = np.empty(n, np.int8)
+    x_strength = np.empty(n, np.float64)
+    hedge = np.empty(n, np.float64)
+    count = 0
+
+    sxy = sxx = syy = sx = sy = 0.0
+    long_market = False
+    short_market = False
+
+    for i in range(n):
+        if (i + 1) % window == 0:
+            sxy = sxx = syy = sx = sy = 0.0
+            for j in range(i - window + 1, i + 1):
+                sxy += x[j] * y[j]
+                sxx += x[j] * x[j]
+                syy += y[j] * y[j]
+                sx += x[j]
+                sy += y[j]
+        else:
+            sxy += x[i] * y[i]
+            sxx += x[i] * x[i]
+            syy += y[i] * y[i]
+            sx += x[i]
+            sy += y[i]
+            if i >= window:
+                k = i - window
+                sxy -= x[k] * y[k]
+                sxx -= x[k] * x[k]
+                syy -= y[k] * y[k]
+                sx -= x[k]
+                sy -= y[k]
+
+        if i + 1 < window:
+            continue
+        h = sxy / sxx
+        mean = (sy - h * sx) / window
+        var = (syy - 2.0 * h * sxy + h * h * sxx) / window - mean * mean
+        if not var > 0.0:
+            continue
+        zscore = ((y[i] - h * x[i]) - mean) / np.sqrt(var)
+
+        #Same threshold logic as IntradayOLSMRStrategy.calculate_xy_signals,
+        #SigType values: LONG = 1, SHORT = -1, EXIT = 0
+        signal = False
+        if not (long_market or short_market):
+            if zscore <= -zscore_high:
+                long_market = True
+                signal = True
+                y_d, x_d, x_s = 1, -1, abs(h)
+            elif zscore >= zscore_high:
+                short_market = True
+                signal = True
+                y_d, x_d, x_s = -1, 1, abs(h)
+        elif abs(zscore) <= zscore_low:
+            long_market = short_market = False
+            signal = True
+            y_d, x_d, x_s = 0, 0, 1.0
+
+        if signal:
+            bar_idx[count] = i
+            y_dir[count] = y_d
+            x_dir[count] = x_d
+            x_strength[count] = x_s
+            hedge[count] = h
+            count += 1
+
+    return (bar_idx[:count], y_dir[:count], x_dir[:count],
+            x_strength[:count], hedge[:count])
+
+
 class IntradayOLSMRStrategy(Strategy):
     """
     Use ordinary least sqaures to perform rolling linear regression to determine
@@ -27,7 +120,7 @@ class IntradayOLSMRStrategy(Strategy):
     """
     #Can change zscores to set different interval thresholds
     def __init__(self, bars, events, ols_window=100, zscore_low=0.5,
-                 zscore_high=3.0):
+                 zscore_high=3.0, batch_size=None, precompute_signals=False):
         """
         Parameters
         ----------
@@ -36,6 +129,14 @@ class IntradayOLSMRStrategy(Strategy):
         ols_window : optional window for ols. The default is 100.
         zscore_low : optional, zscore low threshold. The default is 0.5
         zscore_high : optional, zscore high threshold The default is 3.0
+        batch_size : optional, if set the hedge ratio and zscore are computed
+        for this many bars at a time with calculate_signals_vectorized()
+        instead of once per bar. Needs the whole history up front, so it is
+        only valid for historic data. The default is None.
+        precompute_signals : optional, if True every signal of the backtest is
+        computed up front by run_mr() and each bar just emits its precomputed
+        signals. Needs the whole history up front, so it is only valid for
+        historic data. The default is False.
         """
         self.bars = bars
         self.symbol_list = self.bars.symbol_list
@@ -43,21 +144,38 @@ class IntradayOLSMRStrategy(Strategy):
         self.ols_window = ols_window
         self.zscore_low = zscore_low
         self.zscore_high = zscore_high
+        self.batch_size = batch_size
 
         self.pair = ('SPY', 'QQQ')
-        self.datetime = datetime.datetime.now(datetime.UTC)
 
         self.long_market = False
         self.short_market = False
 
+        #Running sums over the ols_window, updated once per bar
+        self._sxy = self._sxx = self._sx = self._sy = self._syy = 0.0
+        self._filled = 0
+
+        #Bars [_batch_t0, _batch_t1) precomputed when batch_size is set
+        self._batch_t0 = self._batch_t1 = 0
+        self._batch_hedge = self._batch_zscore = None
 
-    def calculate_xy_signals(self, zscore_last):
+        #Signal table from run_mr() and the next row to emit
+        self.precompute_signals = precompute_signals
+        if precompute_signals:
+            self._signals = run_mr(
+                self.bars.symbol_data[self.pair[0]]['close'],
+                self.bars.symbol_data[self.pair[1]]['close'],
+                self.ols_window, self.zscore_low, self.zscore_high)
+            self._next_signal = 0
+
+    def calculate_xy_signals(self, zscore_last, dt):
         """
         Calculates x, y signal pairings to be sent to the signal generator.
 
         Parameters
         ----------
         zscore_last : Current zscore to test
+        dt : Datetime of the current bar, used as the signals' timestamp
 
         Returns
         -------
@@ -69,60 +187,206 @@ class IntradayOLSMRStrategy(Strategy):
         x_signal = None
         p0 = self.pair[0]
         p1 = self.pair[1]
-        dt = self.datetime
         hr = abs(self.hedge_ratio)
 
-        #If long the market and below the negative of high zscore threshold
-        if zscore_last <= -self.zscore_high and not self.long_market:
-            self.long_market = True
-            y_signal = SignalEvent(1, p0, dt, 'LONG', 1.0)
-            x_signal = SignalEvent(1, p1, dt, 'SHORT', hr)
-
-        #If long the market and between the abs. value of low zscore threshold
-        if abs(zscore_last) <= self.zscore_low and self.long_market:
-            self.long_market = False
-            y_signal = SignalEvent(1, p0, dt, 'EXIT', 1.0)
-            x_signal = SignalEvent(1, p1, dt, 'EXIT', 1.0)
-
-        #If short the market and above high zscore threshold
-        if zscore_last >= self.zscore_high and not self.short_market:
-            self.short_market = True
-            y_signal = SignalEvent(1, p0, dt, 'SHORT', 1.0)
-            x_signal = SignalEvent(1, p1, dt, 'LONG', hr)
-
-        #If short the market and between abs. value of low zscore threshold
-        if abs(zscore_last) <= self.zscore_low and self.short_market:
-            self.short_market = False
-            y_signal = SignalEvent(1, p0, dt, 'EXIT', 1.0)
-            x_signal = SignalEvent(1, p1, dt, 'EXIT', 1.0)
+        #Entries only while flat, exits only while in the market, so at most
+        #one branch fires per bar
+        if not (self.long_market or self.short_market):
+            #Below the negative of high zscore threshold, long the spread
+            if zscore_last <= -self.zscore_high:
+                self.long_market = True
+                y_signal = SignalEvent(1, p0, dt, SigType.LONG, 1.0)
+                x_signal = SignalEvent(1, p1, dt, SigType.SHORT, hr)
+
+            #Above high zscore threshold, short the spread
+            elif zscore_last >= self.zscore_high:
+                self.short_market = True
+                y_signal = SignalEvent(1, p0, dt, SigType.SHORT, 1.0)
+                x_signal = SignalEvent(1, p1, dt, SigType.LONG, hr)
+
+        #In the market and between the abs. value of low zscore threshold
+        elif abs(zscore_last) <= self.zscore_low:
+            self.long_market = self.short_market = False
+            y_signal = SignalEvent(1, p0, dt, SigType.EXIT, 1.0)
+            x_signal = SignalEvent(1, p1, dt, SigType.EXIT, 1.0)
 
         return y_signal, x_signal
 
-    def calculate_signals_for_pairs(self):
+    def _update_window_sums(self):
         """
-        Generates new set of signals from the mean reversion strategy.
-        Calculates hedge ratio between pair.
+        Adds the newest bar of the pair to the running sums and removes the
+        bar that has left the ols_window. Every ols_window bars the sums are
+        recomputed from the window itself so rounding errors can't build up.
+
+        Returns
+        -------
+        Newest (y, x) close prices of the pair
         """
-        y = self.bars.get_latest_bars_values(self.pair[0], "close",
-                                             N=self.ols_window)
-        x = self.bars.get_latest_bars_values(self.pair[1], "close",
-                                             N=self.ols_window)
+        N = self.ols_window
+        y_new, y_old = self.bars.get_window_edge_values(self.pair[0], "close", N)
+        x_new, x_old = self.bars.get_window_edge_values(self.pair[1], "close", N)
+        self._filled += 1
+
+        if self._filled % N == 0:
+            y = self.bars.get_latest_bars_values(self.pair[0], "close", N=N)
+            x = self.bars.get_latest_bars_values(self.pair[1], "close", N=N)
+            self._sxy = x @ y
+            self._sxx = x @ x
+            self._syy = y @ y
+            self._sx = x.sum()
+            self._sy = y.sum()
+        else:
+            self._sxy += x_new * y_new
+            self._sxx += x_new * x_new
+            self._syy += y_new * y_new
+            self._sx += x_new
+            self._sy += y_new
+            if y_old is not None and x_old is not None:
+                self._sxy -= x_old * y_old
+                self._sxx -= x_old * x_old
+                self._syy -= y_old * y_old
+                self._sx -= x_old
+                self._sy -= y_old
+        return y_new, x_new
+
+    def calculate_signals_vectorized(self, t0, t1):
+        """
+        Calculates the hedge ratio and zscore of the spread for every bar in
+        [t0, t1) in one pass over the close arrays of the pair, using rolling
+        sums from cumulative sums. Each bar only uses the ols_window bars up
+        to and including itself.
 
-        if y is not None and x is not None:
-            #Check all window periods are available
-            if len(y) >= self.ols_window and len(x) >= self.ols_window:
-                #Calculate current hedge ratio using OLS
-                self.hedge_ratio = sm.OLS(y, x).fit().params[0]
+        Parameters
+        ----------
+        t0 : Index of the first bar
+        t1 : Index one past the last bar
 
-                #Calculate the current zscore of residuals
-                spread = y - self.hedge_ratio * x
-                zscore_last = ((spread - spread.mean())/spread.std())[-1]
+        Returns
+        -------
+        Arrays of hedge ratios and zscores for the bars, NaN where a full
+        window isn't available yet
+        """
+        N = self.ols_window
+        lo = max(0, t0 - N + 1)
+        y = self.bars.symbol_data[self.pair[0]]['close'][lo:t1]
+        x = self.bars.symbol_data[self.pair[1]]['close'][lo:t1]
+
+        hedge = np.full(t1 - t0, np.nan)
+        zscore = np.full(t1 - t0, np.nan)
+        if len(y) < N:
+            return hedge, zscore
+
+        def window_sums(a):
+            c = np.concatenate(([0.0], np.cumsum(a)))
+            return c[N:] - c[:-N]
+
+        #Window k ends at bar lo + N - 1 + k
+        sxy = window_sums(x * y)
+        sxx = window_sums(x * x)
+        syy = window_sums(y * y)
+        sx = window_sums(x)
+        sy = window_sums(y)
+
+        h = sxy / sxx
+        mean = (sy - h * sx) / N
+        var = (syy - 2.0 * h * sxy + h * h * sxx) / N - mean * mean
+        spread_last = y[N - 1:] - h * x[N - 1:]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = np.where(var > 0.0, (spread_last - mean) / np.sqrt(var), np.nan)
+
+        first = lo + N - 1 - t0
+        hedge[first:] = h
+        zscore[first:] = z
+        return hedge, zscore
+
+    def _batched_zscore(self):
+        """
+        Looks up the zscore of the current bar from the precomputed batch,
+        computing the next batch_size bars when the current bar is outside it.
 
-                #Calculate signals and add to events queue
-                y_signal, x_signal = self.calculate_xy_signals(zscore_last)
-                if y_signal is not None and x_signal is not None:
-                    self.events.put(y_signal)
-                    self.events.put(x_signal)
+        Returns
+        -------
+        Current zscore or None if it isn't available
+        """
+        t = self.bars.cursor[self.pair[0]]
+        if not self._batch_t0 <= t < self._batch_t1:
+            self._batch_t0 = t
+            self._batch_t1 = min(t + self.batch_size, self.bars.n[self.pair[0]])
+            self._batch_hedge, self._batch_zscore = \
+                self.calculate_signals_vectorized(self._batch_t0, self._batch_t1)
+
+        zscore_last = self._batch_zscore[t - self._batch_t0]
+        if np.isnan(zscore_last):
+            return None
+        self.hedge_ratio = self._batch_hedge[t - self._batch_t0]
+        return zscore_last
+
+    def _incremental_zscore(self):
+        """
+        Updates the running sums with the current bar and derives the hedge
+        ratio and zscore of the spread from them.
+
+        Returns
+        -------
+        Current zscore or None if it isn't available
+        """
+        y_new, x_new = self._update_window_sums()
+
+        #Check all window periods are available
+        if self._filled < self.ols_window:
+            return None
+        n = self.ols_window
+
+        #Calculate current hedge ratio using OLS (no intercept),
+        #closed form for a single regressor: (x.y)/(x.x)
+        self.hedge_ratio = h = self._sxy / self._sxx
+
+        #Mean and variance of the spread y - h*x over the window derived
+        #from the running sums, only the last spread value is needed
+        mean = (self._sy - h * self._sx) / n
+        var = (self._syy - 2.0 * h * self._sxy + h * h * self._sxx) / n \
+            - mean * mean
+        if var <= 0.0:
+            return None
+        return ((y_new - h * x_new) - mean) / np.sqrt(var)
+
+    def _emit_precomputed_signals(self):
+        """
+        Adds the signal pair precomputed by run_mr() for the current bar, if
+        there is one, to the events queue.
+        """
+        bar_idx, y_dir, x_dir, x_strength, hedge = self._signals
+        k = self._next_signal
+        if k < len(bar_idx) and bar_idx[k] == self.bars.cursor[self.pair[0]]:
+            self._next_signal += 1
+            self.hedge_ratio = hedge[k]
+            dt = self.bars.get_latest_bar_datetime(self.pair[0])
+            self.events.append(SignalEvent(1, self.pair[0], dt,
+                                           SigType(y_dir[k]), 1.0))
+            self.events.append(SignalEvent(1, self.pair[1], dt,
+                                           SigType(x_dir[k]), x_strength[k]))
+
+    def calculate_signals_for_pairs(self):
+        """
+        Generates new set of signals from the mean reversion strategy.
+        Calculates hedge ratio between pair.
+        """
+        if self.precompute_signals:
+            self._emit_precomputed_signals()
+            return
+
+        if self.batch_size is not None:
+            zscore_last = self._batched_zscore()
+        else:
+            zscore_last = self._incremental_zscore()
+
+        if zscore_last is not None:
+            #Calculate signals and add to events queue
+            dt = self.bars.get_latest_bar_datetime(self.pair[0])
+            y_signal, x_signal = self.calculate_xy_signals(zscore_last, dt)
+            if y_signal is not None and x_signal is not None:
+                self.events.append(y_signal)
+                self.events.append(x_signal)
 
     def calculate_signals(self, event):
         """
@@ -130,7 +394,7 @@ class IntradayOLSMRStrategy(Strategy):
         ----------
         event : Event Queue object
         """
-        if event.type == 'MARKET':
+        if event.type == EvType.MARKET:
             self.calculate_signals_for_pairs()
 
 if __name__ == "__main__":
@@ -9,7 +9,7 @@ import pandas as pd
 import statsmodels.api as sm
 
 from strategy import Strategy
-from event import SignalEvent
+from event import EvType, SignalEvent, SigType
 from backtest import Backtest
 from data import HistoricCSVDataHandler
 from execution import SimulatedExecutionHandler
@@ -22,7 +22,8 @@ class MovingAverageCrossStrategy(Strategy):
     weighted moving average. Default long/short windows are 400/100 respectively.
     """
 
-    def __init__(self, bars, events, short_window=5, long_window=20):
+    def __init__(self, bars, events, short_window=5, long_window=20,
+                 verbose=False):
         """
         Initializes MA Cross strategy.
 
@@ -32,28 +33,88 @@ class MovingAverageCrossStrategy(Strategy):
         events : Event Queue object
         short_window : Short moving avg.lookback, optional, The default is 100.
         long_window : Long moving avg.lookback, optional, The default is 400.
+        verbose (bool) : optional, print every crossover, default = False
         """
         self.bars = bars
         self.symbol_list = self.bars.symbol_list
         self.events = events
         self.short_window = short_window
         self.long_window = long_window
+        self.verbose = verbose
+
+        #Latest long_window closes of every symbol (one row per symbol, a
+        #ring buffer whose column _pos is overwritten next) and running sums
+        #of the last short_window/long_window of them, updated once per bar
+        #for all symbols at once. NaN closes (bars padded in before a
+        #symbol's first bar) are left out of the sums and counted instead
+        n_sym = len(self.symbol_list)
+        self._closes = np.zeros((n_sym, long_window))
+        self._pos = 0
+        self._filled = 0
+        self._short_sum = np.zeros(n_sym)
+        self._long_sum = np.zeros(n_sym)
+        self._short_nan = np.zeros(n_sym, dtype=np.int64)
+        self._long_nan = np.zeros(n_sym, dtype=np.int64)
+        self._last_dt = None
 
         #Set to True if symbol is in the market
-        self.bought = self._calculate_initial_bought()
+        self._in_market = np.zeros(n_sym, dtype=bool)
 
-    def _calculate_initial_bought(self):
+    def _update_sums(self, close):
         """
-        Adds keys (symbols) to the bought dictionary and sets values to 'OUT'.
+        Adds the newest closes to the running sums and removes the closes
+        that have left the short/long windows, for every symbol at once.
+        Every long_window bars the sums are recomputed from the buffer so
+        rounding errors can't build up.
+
+        Parameters
+        ----------
+        close : Newest close of every symbol, in symbol_list order
 
         Returns
         -------
-        Dictionary with keys of each symbol in symbol_list and values to 'OUT'.
+        Short and long SMA vectors, over fewer bars while the windows are
+        filling. An SMA is NaN while its window holds a NaN close, like the
+        mean over that window would be
         """
-        bought = {}
-        for s in self.symbol_list:
-            bought[s] = 'OUT'
-        return bought
+        closes = self._closes
+        pos = self._pos
+        sw = self.short_window
+        lw = self.long_window
+        n = min(self._filled, lw)
+        if n == lw:
+            old = closes[:, pos]
+            old_nan = np.isnan(old)
+            self._long_sum -= np.where(old_nan, 0.0, old)
+            self._long_nan -= old_nan
+        if n >= sw:
+            old = closes[:, (pos - sw) % lw]
+            old_nan = np.isnan(old)
+            self._short_sum -= np.where(old_nan, 0.0, old)
+            self._short_nan -= old_nan
+        closes[:, pos] = close
+        new_nan = np.isnan(close)
+        new = np.where(new_nan, 0.0, close)
+        self._long_sum += new
+        self._short_sum += new
+        self._long_nan += new_nan
+        self._short_nan += new_nan
+        self._pos = (pos + 1) % lw
+        self._filled += 1
+        n = min(self._filled, lw)
+
+        if self._filled % lw == 0:
+            #_pos is back at 0 so the buffer is oldest to newest, cumsum
+            #adds the closes in that order
+            clean = np.where(np.isnan(closes), 0.0, closes)
+            self._long_sum = clean.cumsum(axis=1)[:, -1]
+            self._short_sum = clean[:, lw - sw:].cumsum(axis=1)[:, -1]
+
+        short_sma = self._short_sum / min(n, sw)
+        long_sma = self._long_sum / n
+        short_sma[self._short_nan > 0] = np.nan
+        long_sma[self._long_nan > 0] = np.nan
+        return short_sma, long_sma
 
 
     def calculate_signals(self, event):
@@ -65,33 +126,45 @@ class MovingAverageCrossStrategy(Strategy):
         ----------
         event : MarketEvent object
         """
-        if event.type == 'MARKET':
-            for s in self.symbol_list:
-                bars = self.bars.get_latest_bars_values(s, "close",
-                                                        N=self.long_window)
-                bar_date = self.bars.get_latest_bar_datetime(s)
-
-                if bars is not None:    #removed "and bars != []", depricated
-                    short_sma = np.mean(bars[-self.short_window:])
-                    long_sma = np.mean(bars[-self.long_window:])
-
-                    symbol = s
-
-                    dt = datetime.datetime.now(datetime.UTC)
-                    sig_dir = ""
-
-                    if short_sma > long_sma and self.bought[s] == "OUT":
+        if event.type == EvType.MARKET:
+            #The daily handler sends its final bar twice. A bar that is
+            #already in the running sums must not be added again
+            bar_dt = self.bars.get_latest_bar_datetime(self.symbol_list[0])
+            if bar_dt == self._last_dt:
+                return
+            self._last_dt = bar_dt
+
+            short_sma, long_sma = self._update_sums(
+                self.bars.get_latest_closes())
+
+            #Crossings of every symbol found in one pass, only the symbols
+            #that changed state are visited
+            in_market = self._in_market
+            enter = (short_sma > long_sma) & ~in_market
+            leave = (short_sma < long_sma) & in_market
+
+            get_dt = self.bars.get_latest_bar_datetime
+            append = self.events.append
+            verbose = self.verbose
+
+            for i in np.flatnonzero(enter | leave):
+                symbol = self.symbol_list[i]
+                bar_date = get_dt(symbol)       #Signals carry the bar's time
+
+                if enter[i]:
+                    if verbose:
                         print("LONG: %s" % bar_date)
-                        sig_dir = "LONG"
-                        signal = SignalEvent(1, symbol, dt, sig_dir, 1.0)
-                        self.events.put(signal)
-                        self.bought[s] = 'LONG'
-                    elif short_sma < long_sma and self.bought[s] == "LONG":
+                    sig_dir = SigType.LONG
+                    signal = SignalEvent(1, symbol, bar_date, sig_dir, 1.0)
+                    append(signal)
+                    in_market[i] = True
+                else:
+                    if verbose:
                         print("SHORT: %s" % bar_date)
-                        sig_dir = 'EXIT'
-                        signal = SignalEvent(1, symbol, dt, sig_dir, 1.0)
-                        self.events.put(signal)
-                        self.bought[s] = 'OUT'
+                    sig_dir = SigType.EXIT
+                    signal = SignalEvent(1, symbol, bar_date, sig_dir, 1.0)
+                    append(signal)
+                    in_market[i] = False
 
 
 
@@ -1,17 +1,97 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 import datetime
-import pandas as pd
+import functools
+import hashlib
+import os, os.path
+
+import joblib
+import numpy as np
+import sklearn
 from sklearn.discriminant_analysis import QuadraticDiscriminantAnalysis
 # from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
 # from sklearn.linear_model import LogisticRegression
 from strategy import Strategy
-from event import SignalEvent
+from event import EvType, SignalEvent, SigType
 from backtest import Backtest
 from data import HistoricCSVDataHandler
 from execution import SimulatedExecutionHandler
 from portfolio import Portfolio
-from create_lagged_series import create_lagged_series
+from create_lagged_series import create_lagged_series, csv_key, CACHE_DIR
+
+
+@functools.lru_cache(maxsize=16)
+def _build_model(symbol, start_date, end_date, start_test_date, lags,
+                 csv_stat):
+    """
+    Fits the forecast model, cached per process on its arguments so repeated
+    runs of the same configuration (e.g. parameter sweeps) share one model.
+
+    Parameters
+    ----------
+    symbol (str) : Ticker symbol
+    start_date : First date of the lagged series
+    end_date : Last date of the lagged series
+    start_test_date : First date of the test set, earlier dates are trained on
+    lags (int) : Number of lagged returns to create
+    csv_stat : csv_key() of the price CSV. Only part of the cache key, so the
+        model is refitted once the CSV changes
+
+    Returns
+    -------
+    Fitted model
+    """
+    # Create lagged series of S&P500 stock index
+    snpret = create_lagged_series(symbol, start_date, end_date, lags=lags)
+
+
+    # Use prior 2 days returns as predictor values and direction as response
+    X = snpret[["Lag1", "Lag2"]]
+    y = snpret["Direction"]
+
+    # Create training and test sets
+    start_test = start_test_date
+
+
+
+    X_train = X[X.index < start_test]
+    X_test = X[X.index >= start_test]
+    y_train = y[y.index < start_test]
+    y_test = y[y.index >= start_test]
+
+
+
+    model = QuadraticDiscriminantAnalysis()#Can replace model by changing this line
+
+    #Fitted on plain arrays so predict() can be given a NumPy row
+    #without sklearn checking feature names
+    X_train = X_train.to_numpy()
+    y_train = y_train.to_numpy()
+
+    #Fitted model is cached on disk, keyed on the model type, its parameters,
+    #the sklearn version and the training data, and reloaded instead of
+    #refitted on later runs
+    key = hashlib.sha1(
+        repr((type(model).__name__, sorted(model.get_params().items()),
+              sklearn.__version__)).encode() +
+        X_train.tobytes() + y_train.tobytes()).hexdigest()
+    cache_path = os.path.join(CACHE_DIR, '%s.joblib' % key)
+    if os.path.exists(cache_path):
+        return joblib.load(cache_path)
+
+    model.fit(X_train, y_train)
+
+    #Written to a temporary file first so a concurrent run never loads a
+    #partial model. A cache that can't be written just means it isn't used
+    tmp_path = '%s.%d.tmp' % (cache_path, os.getpid())
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        joblib.dump(model, tmp_path)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return model
 
 
 class SPYDailyForecastStrategy(Strategy):
@@ -35,7 +115,6 @@ class SPYDailyForecastStrategy(Strategy):
         self.bars = bars
         self.symbol_list = self.bars.symbol_list
         self.events = events
-        self.datetime_now = datetime.datetime.utcnow()
 
         self.model_start_date = datetime.datetime(2015,4,27) #Change these dates
         self.model_end_date = datetime.datetime(2025,4,25)   #Based on data
@@ -46,33 +125,34 @@ class SPYDailyForecastStrategy(Strategy):
         self.bar_index = 0
 
         self.model = self.create_symbol_forecast_model()
+        self._pred_buf = np.empty((1, 2), dtype=np.float64)  #Lag1, Lag2 row
 
 
     def create_symbol_forecast_model(self):
-        # Create lagged series of S&P500 stock index
-        snpret = create_lagged_series(self.symbol_list[0], self.model_start_date,
-                                      self.model_end_date, lags=5)
-
-
-        # Use prior 2 days returns as predictor values and direction as response
-        X = snpret[["Lag1", "Lag2"]]
-        y = snpret["Direction"]
-
-        # Create training and test sets
-        start_test = self.model_start_test_date
-
-
-
-        X_train = X[X.index < start_test]
-        X_test = X[X.index >= start_test]
-        y_train = y[y.index < start_test]
-        y_test = y[y.index >= start_test]
-
+        """
+        Returns
+        -------
+        Forecast model fitted on the lagged returns of the first symbol
+        """
+        return _build_model(self.symbol_list[0], self.model_start_date,
+                            self.model_end_date, self.model_start_test_date, 5,
+                            csv_key())
 
+    def _predict_lags(self, lag1, lag2):
+        """
+        Parameters
+        ----------
+        lag1 : Lag1 predictor value
+        lag2 : Lag2 predictor value
 
-        model = QuadraticDiscriminantAnalysis()#Can replace model by changing this line
-        model.fit(X_train, y_train)
-        return model
+        Returns
+        -------
+        Predicted direction
+        """
+        #Reused 1x2 buffer instead of building a DataFrame per prediction
+        self._pred_buf[0, 0] = lag1
+        self._pred_buf[0, 1] = lag2
+        return self.model.predict(self._pred_buf)[0]
 
     def calculate_signals(self, event):
         """
@@ -83,32 +163,26 @@ class SPYDailyForecastStrategy(Strategy):
         events : Events queue object
         """
         sym = self.symbol_list[0]
-        dt = self.datetime_now
 
-        if event.type == 'MARKET':
+        if event.type == EvType.MARKET:
+            bars = self.bars
+            dt = bars.get_latest_bar_datetime(sym)
             self.bar_index += 1
             if self.bar_index > 5:
 
-                lags = self.bars.get_latest_bars_values(self.symbol_list[0],
-                                                        "close", N=3)
-
-
-                pred_series = pd.DataFrame({'Lag1': [lags[1]*100.0],  #change to df
-                                         'Lag2' : [lags[2]*100.0]})   #lags required in lists
-
-
+                lags = bars.get_latest_bars_values(sym, "close", N=3)
 
 
-                pred = self.model.predict(pred_series)
+                pred = self._predict_lags(float(lags[1]*100.0), float(lags[2]*100.0))
                 if pred > 0 and not self.long_market:
                     self.long_market = True
-                    signal = SignalEvent(1, sym, dt, 'LONG', 1.0)
-                    self.events.put(signal)
+                    signal = SignalEvent(1, sym, dt, SigType.LONG, 1.0)
+                    self.events.append(signal)
 
-                if pred < 0 and self.long_market:
+                elif pred < 0 and self.long_market:
                     self.long_market = False
-                    signal = SignalEvent(1, sym, dt, 'EXIT', 1.0)
-                    self.events.put(signal)
+                    signal = SignalEvent(1, sym, dt, SigType.EXIT, 1.0)
+                    self.events.append(signal)
 
 
 if __name__ == "__main__":